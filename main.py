@@ -1,11 +1,27 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import hashlib
+import io
 import json
 import os
+import re
 
 st.set_page_config(page_title="Personal Finance Dashboard", page_icon="💰", layout="wide")
 
+# Write JSON atomically, skipping the write when the payload is unchanged
+def write_json_if_changed(path, data, state_key, **dump_kwargs):
+    blob = json.dumps(data, **dump_kwargs).encode()
+    digest = hashlib.sha1(blob).hexdigest()
+    if st.session_state.get(state_key) == digest:
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(blob)
+    os.replace(tmp_path, path)
+    st.session_state[state_key] = digest
+
 # Load or initialize budget
 budget_file = "budgets.json"
 
@@ -17,8 +33,7 @@ if os.path.exists(budget_file):
         st.session_state.budgets = json.load(f)
 
 def save_budgets():
-    with open(budget_file, "w") as f:
-        json.dump(st.session_state.budgets, f)
+    write_json_if_changed(budget_file, st.session_state.budgets, "budgets_hash")
 
 
 # Load or initialize categories
@@ -34,36 +49,161 @@ if os.path.exists(category_file):
         st.session_state.categories = json.load(f)
 
 def save_categories():
-    with open(category_file, "w") as f:
-        json.dump(st.session_state.categories, f, indent=2)
-
-# Categorize based on keywords
-def categorize_transactions(df):
-    df["Category"] = "Uncategorized"
-    for category, keywords in st.session_state.categories.items():
-        if category == "Uncategorized" or not keywords:
-            continue
-        for keyword in keywords:
-            mask = df["Details"].str.contains(keyword, case=False, na=False)
-            df.loc[mask, "Category"] = category
+    write_json_if_changed(category_file, st.session_state.categories, "categories_hash", indent=2)
+
+# Compiled keyword patterns, shared across sessions and rebuilt only when
+# the keyword lists actually change
+@st.cache_resource(show_spinner=False)
+def compile_patterns(categories_key):
+    # One alternation regex per category instead of a scan per keyword;
+    # keywords are pre-lowered so the scan can run case-sensitively
+    return {
+        category: re.compile("|".join(re.escape(k.lower()) for k in keywords))
+        for category, keywords in categories_key
+    }
+
+# Categorize based on keywords (cached per DataFrame + keyword set)
+@st.cache_data(show_spinner=False)
+def categorize_transactions(df, categories):
+    names = list(categories)
+    if "Uncategorized" not in names:
+        names = ["Uncategorized"] + names
+    # Write integer category codes instead of strings, then build the
+    # Category column as a Categorical in one shot
+    codes = np.full(len(df), names.index("Uncategorized"), dtype="int64")
+    patterns = compile_patterns(tuple(
+        (category, tuple(keywords))
+        for category, keywords in categories.items()
+        if category != "Uncategorized" and keywords
+    ))
+    # First-run state: no keywords configured yet, so skip the Details
+    # case-fold and the scan loop entirely
+    if not patterns:
+        df["Category"] = pd.Categorical.from_codes(codes, categories=names)
+        return df
+    # Case-fold Details once up front
+    details_low = df["Details"].astype("string").str.lower()
+    for category, pattern in patterns.items():
+        mask = details_low.str.contains(pattern, na=False).to_numpy(dtype=bool)
+        codes[mask] = names.index(category)
+    df["Category"] = pd.Categorical.from_codes(codes, categories=names)
+    return df
+
+# Known bank-statement date layouts mapped to strptime formats
+date_formats = [
+    (r"\d{2}/\d{2}/\d{4}", "%d/%m/%Y"),
+    (r"\d{2}-\d{2}-\d{4}", "%d-%m-%Y"),
+    (r"\d{4}-\d{2}-\d{2}", "%Y-%m-%d"),
+]
+
+# Detect a fixed date format from the first rows so pandas can parse the
+# whole column with its C strptime path instead of per-row dateutil
+def sniff_date_format(dates):
+    sample = dates.dropna().astype(str).str.strip().head(5)
+    if sample.empty:
+        return None
+    for pattern, fmt in date_formats:
+        if sample.str.fullmatch(pattern).all():
+            return fmt
+    return None
+
+# On-disk cache for parsed statements, keyed by file content hash
+cache_dir = "cache"
+
+# Parse CSV or Excel (cached on the raw file bytes so reruns skip the re-read)
+@st.cache_data(show_spinner=False)
+def parse_transactions(file_bytes, file_name):
+    # Reload from the Feather cache when this exact file was parsed before,
+    # even in a fresh session - much cheaper than re-parsing CSV/XLSX
+    key = hashlib.sha1(file_bytes).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{key}.feather")
+    if os.path.exists(cache_path):
+        # Best-effort: a corrupt or stale cache file must never fail the
+        # upload - fall back to re-parsing
+        try:
+            return pd.read_feather(cache_path, dtype_backend="pyarrow")
+        except Exception:
+            pass
+
+    # Arrow-backed dtypes: string ops on Details run as Arrow kernels
+    # instead of per-element Python object dispatch
+    if file_name.endswith(".csv"):
+        df = pd.read_csv(io.BytesIO(file_bytes), engine="pyarrow", dtype_backend="pyarrow")
+    else:
+        df = pd.read_excel(io.BytesIO(file_bytes)).convert_dtypes(dtype_backend="pyarrow")
+    df.columns = [col.strip() for col in df.columns]
+    # Excel usually delivers Amount already numeric - only clean it up when
+    # it arrives as strings with thousands separators
+    if not pd.api.types.is_numeric_dtype(df["Amount"]):
+        df["Amount"] = pd.to_numeric(
+            df["Amount"].astype("string").str.replace(",", "", regex=False),
+            errors="coerce",
+        )
+    # Excel often delivers Date already parsed; otherwise prefer a sniffed
+    # fixed format over the slow dayfirst dateutil fallback
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        fmt = sniff_date_format(df["Date"])
+        if fmt is not None:
+            df["Date"] = pd.to_datetime(df["Date"], format=fmt, errors="coerce", cache=True)
+        else:
+            df["Date"] = pd.to_datetime(df["Date"], errors="coerce", dayfirst=True, cache=True)
+
+    # Best-effort write: go through a temp file and os.replace() so a crash
+    # mid-write cannot leave a corrupt cache file, and swallow serialization
+    # failures so they do not abort an otherwise successful parse
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        df.to_feather(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        pass
     return df
 
 # Load CSV or Excel
 def load_transactions(file):
     try:
-        if file.name.endswith(".csv"):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
-        df.columns = [col.strip() for col in df.columns]
-        df["Amount"] = df["Amount"].astype(str).str.replace(",", "").astype(float)
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce", dayfirst=True)
-        df = categorize_transactions(df)
+        df = parse_transactions(file.getvalue(), file.name)
+        df = categorize_transactions(df, st.session_state.categories)
+        # Categorical dtype so the debit/credit filter runs on integer codes
+        # (Category is already categorical from categorize_transactions)
+        df["Debit/Credit"] = df["Debit/Credit"].str.lower().astype("category")
+        # int64 month code (year * 12 + month - 1): cheaper groupby key than
+        # a Period-to-string column; formatted back to "YYYY-MM" at plot time
+        df["Month"] = (df["Date"].dt.year * 12 + df["Date"].dt.month - 1).astype("Int64")
         return df
     except Exception as e:
         st.error(f"Error reading file: {str(e)}")
         return None
 
+# Hash aggregated DataFrames by content so cached figures are reused
+# whenever the aggregation output is unchanged
+df_hash_funcs = {
+    pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes()
+}
+
+# Figure builders cached on the aggregated data - reruns that leave the
+# aggregates untouched skip rebuilding the Plotly figure spec
+@st.cache_data(show_spinner=False, hash_funcs=df_hash_funcs)
+def category_pie_chart(category_totals):
+    return px.pie(category_totals, values="Amount", names="Category", title="💸 Expenses by Category")
+
+@st.cache_data(show_spinner=False, hash_funcs=df_hash_funcs)
+def monthly_trend_chart(monthly_category_trend):
+    return px.bar(
+        monthly_category_trend,
+        x="Month",
+        y="Amount",
+        color="Category",
+        title="Monthly Spending by Category",
+        barmode="stack"
+    )
+
+# Format int64 month codes back into "YYYY-MM" labels for display
+def month_labels(codes):
+    mapping = {code: f"{code // 12:04d}-{code % 12 + 1:02d}" for code in codes.unique()}
+    return codes.map(mapping)
+
 # Add new keyword to category
 def add_keyword_to_category(category, keyword):
     keyword = keyword.strip()
@@ -83,16 +223,49 @@ def main():
         df = load_transactions(uploaded_file)
 
         if df is not None:
-            debits_df = df[df["Debit/Credit"].str.lower() == "debit"].copy()
-            credits_df = df[df["Debit/Credit"].str.lower() == "credit"].copy()
-            st.session_state.debits_df = debits_df.copy()
+            # Debit/credit row positions are fixed per uploaded file, so
+            # compute them once and slice positionally on later reruns
+            if st.session_state.get("split_file_id") != uploaded_file.file_id:
+                dc = df["Debit/Credit"]
+                st.session_state.debit_rows = np.flatnonzero(dc.eq("debit").to_numpy())
+                st.session_state.credit_rows = np.flatnonzero(dc.eq("credit").to_numpy())
+                st.session_state.split_file_id = uploaded_file.file_id
+
+            # Keep only the columns the expense views actually read; the
+            # Debit/Credit column is constant within the slice
+            st.session_state.debits_df = df.iloc[st.session_state.debit_rows][
+                ["Date", "Details", "Amount", "Category", "Month"]
+            ]
 
             tab1, tab2, tab3 = st.tabs(["🧾 Expenses (Debits)", "💸 Payments (Credits)", "⚙️ Budget & Category Setup"])
 
             with tab1:
                 st.subheader("📋 Category-wise Expense Summary")
-                category_totals = st.session_state.debits_df.groupby("Category")["Amount"].sum().reset_index()
-                category_totals = category_totals.sort_values("Amount", ascending=False)
+
+                # Per-category totals via a direct bincount over the
+                # categorical codes - one tight C loop instead of groupby
+                # hash aggregation; feeds the summary table, the pie chart
+                # and the budget comparison below
+                cat_col = st.session_state.debits_df["Category"]
+                codes = cat_col.cat.codes.to_numpy()
+                n_cats = len(cat_col.cat.categories)
+                # Zero-fill unparseable amounts so the totals match the
+                # skipna semantics of the trend chart's groupby sum
+                amounts = np.nan_to_num(
+                    st.session_state.debits_df["Amount"].to_numpy(dtype="float64", na_value=np.nan)
+                )
+                cat_totals = np.bincount(codes, weights=amounts, minlength=n_cats)
+                observed = np.bincount(codes, minlength=n_cats) > 0
+                category_totals = pd.DataFrame({
+                    "Category": cat_col.cat.categories[observed],
+                    "Amount": cat_totals[observed],
+                }).sort_values("Amount", ascending=False)
+
+                monthly_cat = (
+                    st.session_state.debits_df
+                    .groupby(["Month", "Category"], observed=True, sort=False)["Amount"]
+                    .sum()
+                )
 
                 st.dataframe(
                     category_totals,
@@ -101,30 +274,14 @@ def main():
                     hide_index=True
                 )
 
-                fig = px.pie(category_totals, values="Amount", names="Category", title="💸 Expenses by Category")
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(category_pie_chart(category_totals), use_container_width=True)
 
                 st.subheader("Category-wise Spending Trend Over Time")
 
-                # Prepare data for time-based trend
-                st.session_state.debits_df["Month"] = st.session_state.debits_df["Date"].dt.to_period("M").astype(str)
-
-                monthly_category_trend = (
-                    st.session_state.debits_df
-                    .groupby(["Month", "Category"])["Amount"]
-                    .sum()
-                    .reset_index()
-                )
+                monthly_category_trend = monthly_cat.reset_index().sort_values("Month")
+                monthly_category_trend["Month"] = month_labels(monthly_category_trend["Month"])
 
-                fig_bar = px.bar(
-                    monthly_category_trend,
-                    x="Month",
-                    y="Amount",
-                    color="Category",
-                    title="Monthly Spending by Category",
-                    barmode="stack"
-                )
-                st.plotly_chart(fig_bar, use_container_width=True)
+                st.plotly_chart(monthly_trend_chart(monthly_category_trend), use_container_width=True)
 
                 if "debits_df" in st.session_state:
                     st.markdown("### 📈 Budget vs Actual (This Month)")
@@ -137,24 +294,26 @@ def main():
                     #     st.session_state.debits_df["Date"].dt.to_period("M").astype(str) == this_month
                     # ]
                     
-                    # Group actual spending by category
-                    actuals_dict = st.session_state.debits_df.groupby("Category")["Amount"].sum().to_dict()
-
-                    # Build comparison table
-                    budget_vs_actual = pd.DataFrame([
-                        {
-                            "Category": cat,
-                            "Budget (INR)": st.session_state.budgets.get(cat, 0),
-                            "Actual Spend (INR)": actuals_dict.get(cat, 0)
-                        }
-                        for cat in st.session_state.categories.keys()
-                        if cat != "Uncategorized"
-                    ])
-
-                    # Calculate difference
-                    budget_vs_actual["Difference"] = (
-                        budget_vs_actual["Budget (INR)"] - budget_vs_actual["Actual Spend (INR)"]
+                    # Actual spending per category, reusing the bincount totals
+                    actuals_dict = dict(zip(cat_col.cat.categories[observed], cat_totals[observed]))
+
+                    # Build comparison table column-wise rather than from a
+                    # list of per-row dicts
+                    cats = [cat for cat in st.session_state.categories if cat != "Uncategorized"]
+                    budgets = np.fromiter(
+                        (st.session_state.budgets.get(cat, 0) for cat in cats),
+                        dtype="float64", count=len(cats),
                     )
+                    actuals = np.fromiter(
+                        (actuals_dict.get(cat, 0) for cat in cats),
+                        dtype="float64", count=len(cats),
+                    )
+                    budget_vs_actual = pd.DataFrame({
+                        "Category": cats,
+                        "Budget (INR)": budgets,
+                        "Actual Spend (INR)": actuals,
+                        "Difference": budgets - actuals,
+                    })
 
                     # Show as table
                     st.dataframe(budget_vs_actual, use_container_width=True)
@@ -162,33 +321,44 @@ def main():
 
             with tab2:
                 st.subheader("💳 Payments Summary")
-                total_credits = credits_df["Amount"].sum()
+                # Sum straight off the Amount column - no credits frame is
+                # materialized unless the table is actually requested
+                total_credits = df["Amount"].iloc[st.session_state.credit_rows].sum()
                 st.metric("Total Credits", f"{total_credits:,.2f} INR")
-                st.dataframe(credits_df, use_container_width=True)
+                if st.toggle("Show transactions"):
+                    # The Month column holds internal int codes - not for display
+                    st.dataframe(
+                        df.iloc[st.session_state.credit_rows].drop(columns="Month"),
+                        use_container_width=True,
+                    )
 
             with tab3:
                 st.subheader("⚙️ Budget & Category Setup")
 
                 with st.expander("📅 Set Monthly Budgets", expanded=True):
-                    budget_cols = st.columns(2)
-                    for i, category in enumerate(st.session_state.categories.keys()):
-                        if category == "Uncategorized":
-                            continue
-                        col = budget_cols[i % 2]
-                        with col:
-                            current_budget = st.session_state.budgets.get(category, 0)
-                            new_budget = st.number_input(
-                                f"{category} Budget (INR)",
-                                min_value=0.0,
-                                value=float(current_budget),
-                                step=100.0,
-                                key=f"budget_input_{category}"
-                            )
-                            st.session_state.budgets[category] = new_budget
-
-                    if st.button("💾 Save Budgets"):
-                        save_budgets()
-                        st.success("Budgets saved successfully!")
+                    # A form batches all budget edits into one rerun on
+                    # Submit instead of rerunning the app on every keystroke
+                    with st.form("budget_form"):
+                        budget_cols = st.columns(2)
+                        new_budgets = {}
+                        for i, category in enumerate(st.session_state.categories.keys()):
+                            if category == "Uncategorized":
+                                continue
+                            col = budget_cols[i % 2]
+                            with col:
+                                current_budget = st.session_state.budgets.get(category, 0)
+                                new_budgets[category] = st.number_input(
+                                    f"{category} Budget (INR)",
+                                    min_value=0.0,
+                                    value=float(current_budget),
+                                    step=100.0,
+                                    key=f"budget_input_{category}"
+                                )
+
+                        if st.form_submit_button("💾 Save Budgets"):
+                            st.session_state.budgets.update(new_budgets)
+                            save_budgets()
+                            st.success("Budgets saved successfully!")
 
                 st.markdown("---")
 
@@ -197,19 +367,39 @@ def main():
 
                     with left_col:
                         st.markdown("### 📋 Existing Categories & Keywords")
-                        for category, keywords in st.session_state.categories.items():
-                            st.markdown(f"#### 🔹 {category}")
-                            if keywords:
-                                for keyword in keywords:
-                                    col1, col2 = st.columns([5, 1])
-                                    col1.markdown(f"- {keyword}")
-                                    if col2.button("❌", key=f"del_{category}_{keyword}"):
-                                        st.session_state.categories[category].remove(keyword)
-                                        save_categories()
-                                        st.experimental_rerun()
-                            else:
-                                st.markdown("*No keywords assigned yet.*")
-                            st.markdown("---")
+                        # One editable grid instead of a button per keyword -
+                        # delete rows (or add new ones) and save in one go
+                        keyword_rows = pd.DataFrame(
+                            [
+                                {"Category": category, "Keyword": keyword}
+                                for category, keywords in st.session_state.categories.items()
+                                for keyword in keywords
+                            ],
+                            columns=["Category", "Keyword"],
+                        )
+                        edited_rows = st.data_editor(
+                            keyword_rows,
+                            column_config={
+                                "Category": st.column_config.SelectboxColumn(
+                                    "Category",
+                                    options=list(st.session_state.categories.keys()),
+                                )
+                            },
+                            num_rows="dynamic",
+                            use_container_width=True,
+                            hide_index=True,
+                            key="keyword_editor",
+                        )
+                        if st.button("💾 Save Keywords"):
+                            updated = {category: [] for category in st.session_state.categories}
+                            for category, keyword in edited_rows.itertuples(index=False):
+                                keyword = str(keyword).strip() if pd.notna(keyword) else ""
+                                if category in updated and keyword and keyword not in updated[category]:
+                                    updated[category].append(keyword)
+                            st.session_state.categories = updated
+                            save_categories()
+                            st.success("Keywords saved successfully!")
+                            st.experimental_rerun()
 
 
                     with right_col: